@@ -9,6 +9,10 @@ from sekoia_automation.storage import PersistentJSON
 from fastly.connector_fastly_waf_audit import FastlyWAFAuditConnector
 from fastly.connector_fastly_waf_base import FastlyWAFConsumer
 
+DATETIME_NOW = datetime(2023, 3, 22, 11, 56, 28, tzinfo=timezone.utc)
+# without cursor, the consumer starts from one minute ago
+DATETIME_EXPECTED_WITHOUT_CURSOR = (DATETIME_NOW - timedelta(minutes=1)).isoformat()
+
 
 @pytest.fixture
 def trigger(data_storage):
@@ -225,18 +229,15 @@ def test_load_without_cursor(trigger, data_storage):
         cache["most_recent_date_seen"] = None
 
     with patch("fastly.connector_fastly_waf_base.datetime.datetime") as mock_datetime:
-        datetime_now = datetime(2023, 3, 22, 11, 56, 28, tzinfo=timezone.utc)
-        datetime_expected = datetime_now - timedelta(minutes=1)
-
-        mock_datetime.now.return_value = datetime_now
-        mock_datetime.side_effect = lambda *args, **kw: datetime(*args, **kw)
+        mock_datetime.now.return_value = DATETIME_NOW
+        mock_datetime.side_effect = datetime
 
         consumer = FastlyWAFConsumer(
             connector=trigger,
             name="site:www.example.com",
             url="https://dashboard.signalsciences.net/api/v0/corps/testcorp/sites/www.example.com/activity",
         )
-        assert consumer.most_recent_date_seen.isoformat() == datetime_expected.isoformat()
+        assert consumer.most_recent_date_seen.isoformat() == DATETIME_EXPECTED_WITHOUT_CURSOR
 
 
 def test_get_sites(trigger, message_sites):
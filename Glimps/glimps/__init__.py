@@ -49,6 +49,7 @@ class SubmitFileToBeAnalysed(GlimpsAction):
         headers: dict = self.get_headers()
         url: str = self.get_url(arguments)
         files: dict = self.get_files(arguments)
+        _, file = files["file"]
 
         # send the request to Glimps
         try:
@@ -58,10 +59,14 @@ class SubmitFileToBeAnalysed(GlimpsAction):
                 retry=retry_if_exception_type(Timeout),
             ):
                 with attempt:
+                    # a timed out attempt may have consumed the file: rewind it before sending it again
+                    file.seek(0)
                     response: Response = requests.post(url, files=files, headers=headers, timeout=self.timeout)
         except RetryError:
             self.log_timeout_error(url, arguments)
             return None
+        finally:
+            file.close()
 
         if not response.ok:
             self.log_request_error(url, arguments, response)
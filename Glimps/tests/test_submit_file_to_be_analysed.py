@@ -1,7 +1,9 @@
 import os
 import shutil
+from unittest.mock import MagicMock, patch
 
 import pytest
+import requests
 import requests_mock
 
 from glimps import SubmitFileToBeAnalysed
@@ -55,6 +57,41 @@ def test_submit_file_to_be_analysed_succeed(symphony_storage):
     assert response.get("uuid") == "1da0cb84-c5cc-4832-8882-4a7e9df11ed2"
 
 
+def test_submit_file_to_be_analysed_retry_on_timeout(symphony_storage):
+    action = SubmitFileToBeAnalysed(data_path=symphony_storage)
+    action.module.configuration = {
+        "api_key": "api_key",
+        "base_url": "https://gmalware.ggp.glimps.re",
+    }
+
+    file_name = "eicar3.txt"
+    file_path = symphony_storage / file_name
+    with file_path.open("w+") as f:
+        f.write("content of the sample")
+
+    arguments = {"file": file_name}
+    files = action.get_files(arguments)
+    action.get_files = MagicMock(return_value=files)
+
+    with requests_mock.Mocker() as mock, patch("time.sleep"):
+        mock.post(
+            "https://gmalware.ggp.glimps.re/api/lite/v2/submit",
+            [
+                {"exc": requests.Timeout},
+                {"status_code": 200, "json": {"uuid": "1da0cb84-c5cc-4832-8882-4a7e9df11ed2", "status": True}},
+            ],
+        )
+        response = action.run(arguments)
+
+        assert mock.call_count == 2
+        # the file was rewound before the second attempt
+        assert b"content of the sample" in mock.request_history[1].body
+
+    assert response is not None
+    assert response.get("uuid") == "1da0cb84-c5cc-4832-8882-4a7e9df11ed2"
+    assert files["file"][1].closed
+
+
 def test_submit_file_to_be_analysed_filesize_exceed(symphony_storage):
     action = SubmitFileToBeAnalysed(data_path=symphony_storage)
     action.module.configuration = {
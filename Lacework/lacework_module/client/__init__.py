@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from typing import Any, Tuple
 
+import orjson
 import requests
 from requests.adapters import Retry
 from requests.auth import AuthBase
@@ -8,6 +9,9 @@ from requests_ratelimiter import LimiterAdapter
 
 from lacework_module.client.auth import LaceworkAuthentication
 
+# Format of the dates returned by the Lacework API
+RFC3339_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
 
 class ApiClient(requests.Session):
     def __init__(self, base_url: str, auth: AuthBase, nb_retries: int = 5, ratelimit_per_hour: int = 480):
@@ -16,7 +20,13 @@ class ApiClient(requests.Session):
         self.auth = auth
         adapter = LimiterAdapter(
             per_hour=ratelimit_per_hour,
-            max_retries=Retry(total=nb_retries, backoff_factor=1),
+            max_retries=Retry(
+                total=nb_retries,
+                backoff_factor=1,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # let the last response through, its status is checked by the callers
+                raise_on_status=False,
+            ),
         )
         self.mount("http://", adapter)
         self.mount("https://", adapter)
@@ -56,7 +66,7 @@ class LaceworkApiClient(ApiClient):
         if not response.ok:
             raise ValueError(f"Request failed with status {response.status_code} - {response.reason}")
 
-        return self._parse_alerts_response(response.json())
+        return self._parse_alerts_response(orjson.loads(response.content))
 
     def get_alerts_by_page(self, url: str) -> Tuple[list[dict[str, Any]] | None, str | None]:
         """
@@ -74,7 +84,7 @@ class LaceworkApiClient(ApiClient):
                 f"Request to fetch next page events failed with status {response.status_code} - {response.reason}"
             )
 
-        return self._parse_alerts_response(response.json())
+        return self._parse_alerts_response(orjson.loads(response.content))
 
     @staticmethod
     def _parse_alerts_response(result: dict[str, Any]) -> Tuple[list[dict[str, Any]] | None, str | None]:
@@ -102,7 +112,7 @@ class LaceworkApiClient(ApiClient):
         Returns:
             datetime:
         """
-        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+        return datetime.strptime(value, RFC3339_FORMAT).replace(tzinfo=timezone.utc)
 
     @staticmethod
     def get_next_page_url(response: dict[str, Any]) -> str | None:
@@ -1,10 +1,13 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from functools import cached_property
+from operator import itemgetter
 from typing import Any
 
 import orjson
 from dateutil.parser import isoparse
+from prometheus_client import Counter, Gauge, Histogram
 from requests.exceptions import HTTPError
 from sekoia_automation.connector import Connector, DefaultConnectorConfiguration
 from sekoia_automation.storage import PersistentJSON
@@ -15,6 +18,9 @@ from lacework_module.client import LaceworkApiClient
 from lacework_module.client.auth import LaceworkAuthentication
 from lacework_module.metrics import EVENTS_LAG, FORWARD_EVENTS_DURATION, OUTCOMING_EVENTS
 
+_get_alert_id = itemgetter("alertId")
+_get_start_time = itemgetter("startTime")
+
 
 class LaceworkConfiguration(DefaultConnectorConfiguration):
     frequency: int = 60
@@ -35,9 +41,46 @@ class LaceworkEventsTrigger(Connector):
     module: LaceworkModule
     configuration: LaceworkConfiguration
 
+    # Number of consecutive unknown errors after which the trigger stops
+    MAX_CONSECUTIVE_ERRORS = 5
+    # Upper bound, in seconds, of the delay before retrying after an unknown error (unless `frequency` is longer)
+    MAX_ERROR_BACKOFF = 600
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.context = PersistentJSON("context.json", self._data_path)
+        self._consecutive_errors = 0
+
+    @cached_property
+    def checkpoint(self) -> dict[str, Any]:
+        """
+        In-memory copy of the context, loaded once and kept in sync by `save_checkpoint`.
+
+        Returns:
+            dict[str, Any]:
+        """
+        with self.context as cache:
+            return dict(cache)
+
+    def save_checkpoint(self, latest_start_event_date: datetime, latest_alert_id: int) -> None:
+        """
+        Persist the latest start event date and alert id, only if they changed since the last save.
+
+        Args:
+            latest_start_event_date: datetime
+            latest_alert_id: int
+        """
+        checkpoint = {
+            "latest_start_event_date_from_previous_run": latest_start_event_date.isoformat(),
+            "latest_alert_id_from_previous_run": latest_alert_id,
+        }
+        if checkpoint.items() <= self.checkpoint.items():
+            return
+
+        with self.context as cache:
+            cache.update(checkpoint)
+
+        self.checkpoint.update(checkpoint)
 
     @property
     def latest_alert_id(self) -> int:
@@ -47,8 +90,7 @@ class LaceworkEventsTrigger(Connector):
         Returns:
             int | None:
         """
-        with self.context as cache:
-            result: int | None = cache.get("latest_alert_id_from_previous_run")
+        result: int | None = self.checkpoint.get("latest_alert_id_from_previous_run")
 
         return result or 0
 
@@ -62,19 +104,18 @@ class LaceworkEventsTrigger(Connector):
         """
         now = datetime.now(timezone.utc)
 
-        with self.context as cache:
-            most_recent_date_seen_str = cache.get("latest_start_event_date_from_previous_run")
+        most_recent_date_seen_str = self.checkpoint.get("latest_start_event_date_from_previous_run")
 
-            if most_recent_date_seen_str is None:
-                return now - timedelta(days=1)
+        if most_recent_date_seen_str is None:
+            return now - timedelta(days=1)
 
-            most_recent_date_seen = isoparse(most_recent_date_seen_str)
+        most_recent_date_seen = isoparse(most_recent_date_seen_str)
 
-            one_week_ago = now - timedelta(days=7)
-            if most_recent_date_seen.replace(tzinfo=timezone.utc) < one_week_ago:
-                most_recent_date_seen = one_week_ago
+        one_week_ago = now - timedelta(days=7)
+        if most_recent_date_seen.replace(tzinfo=timezone.utc) < one_week_ago:
+            most_recent_date_seen = one_week_ago
 
-            return most_recent_date_seen
+        return most_recent_date_seen
 
     @cached_property
     def client(self) -> LaceworkApiClient:
@@ -91,24 +132,33 @@ class LaceworkEventsTrigger(Connector):
             ratelimit_per_hour=480,
         )
 
+    @cached_property
+    def _events_lag_metric(self) -> Gauge:
+        return EVENTS_LAG.labels(intake_key=self.configuration.intake_key)
+
+    @cached_property
+    def _outcoming_events_metric(self) -> Counter:
+        return OUTCOMING_EVENTS.labels(intake_key=self.configuration.intake_key)
+
+    @cached_property
+    def _forward_events_duration_metric(self) -> Histogram:
+        return FORWARD_EVENTS_DURATION.labels(intake_key=self.configuration.intake_key)
+
     def run(self) -> None:  # pragma: no cover
         self.log(message="Lacework Events Trigger has started", level="info")
 
         try:
             while self.running:
-                start = time.time()
+                start = time.monotonic()
 
-                try:
-                    self.forward_next_batches()
-                except (HTTPError, BaseHTTPError) as ex:
-                    self.log_exception(ex, message="Failed to get next batch of events")
-                except Exception as ex:
-                    self.log_exception(ex, message="An unknown exception occurred")
-                    raise
+                error_delay = self.try_forward_next_batches()
+                if error_delay is not None:
+                    time.sleep(error_delay)
+                    continue
 
                 # compute the duration of the last events fetching
-                duration = int(time.time() - start)
-                FORWARD_EVENTS_DURATION.labels(intake_key=self.configuration.intake_key).observe(duration)
+                duration = int(time.monotonic() - start)
+                self._forward_events_duration_metric.observe(duration)
 
                 # Compute the remaining sleeping time
                 delta_sleep = self.configuration.frequency - duration
@@ -118,62 +168,114 @@ class LaceworkEventsTrigger(Connector):
         finally:
             self.log(message="Lacework Events Trigger has stopped", level="info")
 
+    def try_forward_next_batches(self) -> int | None:
+        """
+        Forward the next batches and keep track of the consecutive unknown errors.
+
+        After an unknown error, the next attempt is delayed by `frequency` seconds,
+        doubled after each consecutive error up to `MAX_ERROR_BACKOFF`.
+
+        Returns:
+            int | None: the delay before the next attempt after an unknown error, None otherwise
+
+        Raises:
+            Exception: the unknown error, once `MAX_CONSECUTIVE_ERRORS` happened in a row
+        """
+        try:
+            self.forward_next_batches()
+        except (HTTPError, BaseHTTPError) as ex:
+            self.log_exception(ex, message="Failed to get next batch of events")
+        except Exception as ex:
+            self.log_exception(ex, message="An unknown exception occurred")
+
+            self._consecutive_errors += 1
+            if self._consecutive_errors >= self.MAX_CONSECUTIVE_ERRORS:
+                raise
+
+            frequency = self.configuration.frequency
+            return int(min(frequency * 2 ** (self._consecutive_errors - 1), max(frequency, self.MAX_ERROR_BACKOFF)))
+        else:
+            self._consecutive_errors = 0
+
+        return None
+
+    @staticmethod
+    def _get_most_recent_start_date(alerts: list[dict[str, Any]]) -> datetime:
+        """
+        Get the most recent start date of a list of alerts.
+
+        Lacework returns all its dates in the same fixed-width RFC3339 format, so they sort lexicographically:
+        the dates are compared as strings and only the most recent one is parsed.
+        The API does not document any ordering of the alerts within a page, so the whole page is scanned
+        rather than relying on its first or last alert.
+
+        Args:
+            alerts: list[dict[str, Any]]
+
+        Returns:
+            datetime:
+        """
+        return LaceworkApiClient.parse_response_time(max(map(_get_start_time, alerts)))
+
+    def push_alerts(self, alerts: list[dict[str, Any]]) -> None:
+        """
+        Serialize the alerts and forward them to the intake.
+
+        Args:
+            alerts: list[dict[str, Any]]
+        """
+        self.log(message=f"Sending a batch of {len(alerts)} messages", level="info")
+        self._outcoming_events_metric.inc(len(alerts))
+        # The intake expects each event as its own JSON string: alerts can neither be passed as dicts
+        # nor serialized as a single JSON array
+        self.push_events_to_intakes(events=[orjson.dumps(alert).decode("utf-8") for alert in alerts])
+
     def forward_next_batches(self) -> None:
         """
         Successively queries the Lacework Central API while more are available
-        and the current batch is not too big.
+        and forwards the new alerts of each page by chunks of `chunk_size`.
         """
         start_alerts_date = self.latest_start_event_date
         start_alerts_id = self.latest_alert_id
 
-        alerts, next_page_url = self.client.get_alerts_by_date(start_alerts_date)
+        latest_alerts_id = start_alerts_id
+        latest_alerts_date: datetime | None = None
 
-        data_to_push = []
         current_lag: int = 0
-        if alerts:
-            # As we want to save latest alert id as well we need to get the latest alert id from the current batch
-            latest_alerts_id = max([item["alertId"] for item in alerts])
-            if latest_alerts_id < start_alerts_id:
-                latest_alerts_id = start_alerts_id
 
-            latest_alerts_date = max([LaceworkApiClient.parse_response_time(item["startTime"]) for item in alerts])
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # The first page is requested by date, the following ones are reached through the `nextPage` url
+            alerts, next_page_url = self.client.get_alerts_by_date(start_alerts_date)
+            while True:
+                # Prefetch the next page while the alerts of the current one are forwarded
+                next_page = executor.submit(self.client.get_alerts_by_page, next_page_url) if next_page_url else None
 
-            data_to_push.extend([alert for alert in alerts if alert["alertId"] > start_alerts_id])
-
-            while next_page_url:
-                alerts, next_page_url = self.client.get_alerts_by_page(next_page_url)
                 if alerts:
-                    latest_alerts_id_next_page = max([item["alertId"] for item in alerts])
-                    if latest_alerts_id_next_page > latest_alerts_id:
-                        latest_alerts_id = latest_alerts_id_next_page
-
-                    data_to_push.extend([alert for alert in alerts if alert["alertId"] > start_alerts_id])
-
-                    last_date_page_date = max(
-                        [LaceworkApiClient.parse_response_time(item["startTime"]) for item in alerts]
-                    )
-
-                    if last_date_page_date > latest_alerts_date:
-                        latest_alerts_date = last_date_page_date
-
-                    if len(data_to_push) > self.configuration.chunk_size:
-                        self.log(message=f"Sending a batch of {len(data_to_push)} messages", level="info")
-                        OUTCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(data_to_push))
-                        self.push_events_to_intakes(
-                            events=[orjson.dumps(item).decode("utf-8") for item in data_to_push]
-                        )
+                    latest_alerts_id_page = max(map(_get_alert_id, alerts))
+                    if latest_alerts_id_page > latest_alerts_id:
+                        latest_alerts_id = latest_alerts_id_page
+
+                    latest_alerts_date_page = self._get_most_recent_start_date(alerts)
+                    if latest_alerts_date is None or latest_alerts_date_page > latest_alerts_date:
+                        latest_alerts_date = latest_alerts_date_page
+
+                    # Forward the new alerts of the page right away, by chunks, instead of accumulating them
+                    data_to_push = [alert for alert in alerts if alert["alertId"] > start_alerts_id]
+                    # `chunk_size` has no lower bound in the configuration: never slice by less than one alert
+                    chunk_size = max(1, self.configuration.chunk_size)
+                    for index in range(0, len(data_to_push), chunk_size):
+                        self.push_alerts(data_to_push[index : index + chunk_size])
+
+                    if data_to_push:
                         current_lag = int(time.time() - latest_alerts_date.timestamp())
-                        data_to_push = []
 
-            if len(data_to_push) > 0:
-                self.log(message=f"Sending a batch of {len(data_to_push)} messages", level="info")
-                OUTCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(data_to_push))
-                self.push_events_to_intakes(events=[orjson.dumps(item).decode("utf-8") for item in data_to_push])
-                current_lag = int(time.time() - latest_alerts_date.timestamp())
+                if next_page is None:
+                    break
+
+                alerts, next_page_url = next_page.result()
 
-            with self.context as cache:
-                cache["latest_start_event_date_from_previous_run"] = latest_alerts_date.isoformat()
-                cache["latest_alert_id_from_previous_run"] = latest_alerts_id
+        if latest_alerts_date is not None:
+            self.save_checkpoint(latest_alerts_date, latest_alerts_id)
 
         # Monitor the events lag
-        EVENTS_LAG.labels(intake_key=self.configuration.intake_key).set(current_lag)
+        self._events_lag_metric.set(current_lag)
@@ -1,5 +1,7 @@
 import os
+import threading
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from typing import Any
 
 import pytest
@@ -10,6 +12,56 @@ from lacework_module.client import LaceworkApiClient
 from lacework_module.client.auth import LaceworkAuthentication
 
 
+class UnavailableHandler(BaseHTTPRequestHandler):
+    """
+    Answer every request with a 503 and count the received requests
+    """
+
+    def do_GET(self) -> None:
+        self.server.nb_requests += 1
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def unavailable_server():
+    server = HTTPServer(("127.0.0.1", 0), UnavailableHandler)
+    server.nb_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_retries_on_transient_statuses(session_faker: Faker):
+    account = session_faker.word()
+    auth = LaceworkAuthentication(account, session_faker.word(), session_faker.word())
+    client = LaceworkApiClient(account, auth=auth, nb_retries=3)
+
+    retries = client.get_adapter(f"https://{account}/api/v2/Alerts").max_retries
+    assert retries.total == 3
+    assert set(retries.status_forcelist) == {429, 500, 502, 503, 504}
+    assert retries.raise_on_status is False
+
+
+def test_get_alerts_by_page_raises_value_error_once_retries_are_exhausted(unavailable_server: HTTPServer):
+    # the transport is not mocked here, so that the retries of the adapter are exercised
+    client = LaceworkApiClient("127.0.0.1", auth=lambda request: request, nb_retries=1)
+
+    with pytest.raises(ValueError):
+        client.get_alerts_by_page(f"http://127.0.0.1:{unavailable_server.server_port}/api/v2/Alerts")
+
+    # the first 503 was retried once, then the last response was handed to the caller
+    assert unavailable_server.nb_requests == 2
+
+
 def test_list_alerts(session_faker: Faker, alerts_response: dict[str, Any]):
     account = session_faker.word()
     key_id = session_faker.word()
@@ -29,6 +81,8 @@ def test_list_alerts(session_faker: Faker, alerts_response: dict[str, Any]):
         list_events_response = client.list_alerts()
 
         assert list_events_response is not None
+        # compressed responses are negotiated
+        assert "gzip" in mock.last_request.headers["Accept-Encoding"]
 
 
 @pytest.mark.skipif("{'LACEWORK_ID', 'LACEWORK_SECRET'}.issubset(os.environ.keys()) == False")
@@ -2,11 +2,13 @@ import os
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
 
+import orjson
 import pytest
 import requests_mock
 from faker import Faker
+from requests.exceptions import HTTPError
 
 from lacework_module.base import LaceworkModule
 from lacework_module.client import LaceworkApiClient
@@ -64,6 +66,58 @@ def test_get_next_events(trigger: LaceworkEventsTrigger, alerts_response: dict[s
         trigger.forward_next_batches()
         calls = [call.kwargs["events"] for call in trigger.push_events_to_intakes.call_args_list]
         assert len(calls) > 0
+        # events are forwarded by chunks of `chunk_size`
+        assert [len(events) for events in calls] == [1, 1]
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1])
+def test_get_next_events_with_invalid_chunk_size(
+    trigger: LaceworkEventsTrigger, alerts_response: dict[str, Any], chunk_size: int
+):
+    trigger.configuration.chunk_size = chunk_size
+    host = f"https://{trigger.module.configuration.account}"
+    params = {"token": "foo-token", "expiresAt": str(datetime.utcnow() + timedelta(seconds=3600))}
+    with requests_mock.Mocker() as mock:
+        mock.post(
+            url=f"{host}/api/v2/access/tokens",
+            headers={"X-LW-UAKS": "secret_key", "Content-Type": "application/json"},
+            json=params,
+        )
+
+        mock.get(url=f"{host}/api/v2/Alerts", status_code=200, headers=params, json=alerts_response)
+        trigger.forward_next_batches()
+        calls = [call.kwargs["events"] for call in trigger.push_events_to_intakes.call_args_list]
+        # events are still forwarded, one by one
+        assert [len(events) for events in calls] == [1, 1]
+        assert trigger.latest_alert_id == 855629
+
+
+def test_get_next_events_empty_first_page(
+    trigger: LaceworkEventsTrigger, alerts_response: dict[str, Any], session_faker: Faker
+):
+    host = f"https://{trigger.module.configuration.account}"
+    params = {"token": "foo-token", "expiresAt": str(datetime.utcnow() + timedelta(seconds=3600))}
+    next_page_url = session_faker.uri()
+    with requests_mock.Mocker() as mock:
+        mock.post(
+            url=f"{host}/api/v2/access/tokens",
+            headers={"X-LW-UAKS": "secret_key", "Content-Type": "application/json"},
+            json=params,
+        )
+
+        mock.get(
+            url=f"{host}/api/v2/Alerts",
+            status_code=200,
+            headers=params,
+            json={"paging": {"rows": 0, "totalRows": 2, "urls": {"nextPage": next_page_url}}, "data": []},
+        )
+        mock.get(url=next_page_url, status_code=200, json=alerts_response)
+        trigger.forward_next_batches()
+
+        # the alerts of the next page are forwarded despite the empty first page
+        calls = [call.kwargs["events"] for call in trigger.push_events_to_intakes.call_args_list]
+        assert [orjson.loads(event)["alertId"] for events in calls for event in events] == [855628, 855629]
+        assert trigger.latest_alert_id == 855629
 
 
 def test_get_next_events_1(
@@ -123,6 +177,44 @@ def test_get_next_events_1(
         assert trigger.latest_alert_id == most_recent_alert_id
 
 
+def test_save_checkpoint_only_when_changed(trigger: LaceworkEventsTrigger):
+    latest_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    trigger.save_checkpoint(latest_date, 1)
+    with trigger.context as cache:
+        assert cache["latest_alert_id_from_previous_run"] == 1
+
+    trigger.context = MagicMock()
+    trigger.save_checkpoint(latest_date, 1)
+    trigger.context.__enter__.assert_not_called()
+
+    trigger.save_checkpoint(latest_date, 2)
+    trigger.context.__enter__.assert_called_once()
+    assert trigger.latest_alert_id == 2
+
+
+def test_try_forward_next_batches_backs_off_on_unknown_errors(trigger: LaceworkEventsTrigger):
+    trigger.configuration.frequency = 60
+    trigger.forward_next_batches = Mock(side_effect=ValueError("Request failed"))
+
+    delays = [trigger.try_forward_next_batches() for _ in range(trigger.MAX_CONSECUTIVE_ERRORS - 1)]
+    assert delays == [60, 120, 240, 480]
+
+    with pytest.raises(ValueError):
+        trigger.try_forward_next_batches()
+
+
+def test_try_forward_next_batches_resets_errors_on_success(trigger: LaceworkEventsTrigger):
+    trigger.configuration.frequency = 60
+    trigger.forward_next_batches = Mock(side_effect=[ValueError(), ValueError(), None, ValueError(), HTTPError()])
+
+    assert trigger.try_forward_next_batches() == 60
+    assert trigger.try_forward_next_batches() == 120
+    assert trigger.try_forward_next_batches() is None
+    assert trigger.try_forward_next_batches() == 60
+    # HTTP errors are logged without backing off
+    assert trigger.try_forward_next_batches() is None
+
+
 @pytest.mark.skipif("{'LACEWORK_ID', 'LACEWORK_SECRET'}.issubset(os.environ.keys()) == False")
 def test_forward_next_batches_integration(symphony_storage: Path):
     module = LaceworkModule()